@@ -1,11 +1,7 @@
 import logging
 import sys
 import os
-import argparse
 
-from .metabase import MetabaseClient
-from .parsers.dbt_folder import DbtFolderReader
-from .parsers.dbt_manifest import DbtManifestReader
 from .models.config import MetabaseConfig, DbtConfig
 from .utils import get_version
 
@@ -13,6 +9,28 @@ from typing import Iterable, List, Union, Optional
 
 __version__ = get_version()
 
+# Public names resolved on first access, see __getattr__
+_LAZY_IMPORTS = {
+    "MetabaseClient": ".metabase",
+    "DbtFolderReader": ".parsers.dbt_folder",
+    "DbtManifestReader": ".parsers.dbt_manifest",
+}
+
+
+def __getattr__(name: str):
+    """Imports the HTTP client and readers on first access (PEP 562).
+
+    Keeps `from dbtmetabase import MetabaseClient` working without loading them for the CLI.
+    """
+
+    if name in _LAZY_IMPORTS:
+        import importlib
+
+        value = getattr(importlib.import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def models(
     metabase_config: MetabaseConfig,
@@ -31,6 +49,11 @@ def models(
         dbt_excludes (Iterable, optional): Model names to exclude. Defaults to None.
     """
 
+    # Deferred so that CLI parsing does not pay for importing the HTTP client and readers
+    from .metabase import MetabaseClient
+    from .parsers.dbt_folder import DbtFolderReader
+    from .parsers.dbt_manifest import DbtManifestReader
+
     # Assertions
     if dbt_config.path and dbt_config.manifest_path:
         logging.warning("Prioritizing manifest path arg")
@@ -68,9 +91,9 @@ def models(
         reader = DbtFolderReader(os.path.expandvars(dbt_config.path))
 
     if dbt_config.schema_excludes:
-        dbt_config.schema_excludes = {
+        dbt_config.schema_excludes = frozenset(
             _schema.upper() for _schema in dbt_config.schema_excludes
-        }
+        )
 
     # Process dbt stuff
     dbt_models = reader.read_models(
@@ -120,6 +143,11 @@ def exposures(
         collection_excludes (Iterable, optional): Model names to exclude. Defaults to None.
     """
 
+    # Deferred for the same reason as in models()
+    from .metabase import MetabaseClient
+    from .parsers.dbt_folder import DbtFolderReader
+    from .parsers.dbt_manifest import DbtManifestReader
+
     # Assertions
     if dbt_config.path and dbt_config.manifest_path:
         logging.warning("Prioritizing manifest path arg")
@@ -146,9 +174,9 @@ def exposures(
         reader = DbtFolderReader(os.path.expandvars(dbt_config.path))
 
     if dbt_config.schema_excludes:
-        dbt_config.schema_excludes = {
+        dbt_config.schema_excludes = frozenset(
             _schema.upper() for _schema in dbt_config.schema_excludes
-        }
+        )
 
     # Process dbt stuff
     dbt_models = reader.read_models(
@@ -180,6 +208,8 @@ def exposures(
 
 
 def main(args: List = None):
+    import argparse
+
     logging.basicConfig(
         format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
     )
@@ -1,5 +1,6 @@
-import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import (
     Sequence,
     Optional,
@@ -9,12 +10,17 @@ from typing import (
     Union,
     List,
     Mapping,
+    Set,
+    FrozenSet,
 )
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
 
 from .models.metabase import MetabaseModel, MetabaseColumn
+from .utils import dump_json, load_json
 
 import re
 import yaml
@@ -25,6 +31,9 @@ class MetabaseClient:
     """Metabase API client."""
 
     _SYNC_PERIOD_SECS = 5
+    _SYNC_INITIAL_DELAY_SECS = 0.5
+    _EXPORT_MAX_WORKERS = 16
+    _HTTP_POOL_SIZE = 32
 
     def __init__(
         self,
@@ -49,7 +58,27 @@ class MetabaseClient:
         self.host = host
         self.protocol = "http" if use_http else "https"
         self.verify = verify
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._HTTP_POOL_SIZE,
+            pool_maxsize=self._HTTP_POOL_SIZE,
+            # Retry transient gateway errors with exponential backoff, then let api() handle the response
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.25,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset(["GET", "PUT", "POST"]),
+                raise_on_status=False,
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._database_ids: MutableMapping = {}
+        self._metadata_lookups: MutableMapping = {}
+        self._fields_lock = threading.Lock()
         self.session_id = self.get_session_id(user, password)
+        # Authenticate every subsequent request made through the HTTP session
+        self._session.headers["X-Metabase-Session"] = self.session_id
         self.collections: Iterable = []
         self.tables: Iterable = []
         self.table_map: MutableMapping = {}
@@ -115,16 +144,17 @@ class MetabaseClient:
 
         self.api("post", f"/api/database/{database_id}/sync_schema")
 
-        deadline = int(time.time()) + timeout
-        sync_successful = False
+        # Back off exponentially, so that fast syncs are detected early while slow ones
+        # are polled at most every sync period
+        deadline = time.monotonic() + timeout
+        delay = self._SYNC_INITIAL_DELAY_SECS
         while True:
-            sync_successful = self.models_compatible(database_id, models)
-            time_after_wait = int(time.time()) + self._SYNC_PERIOD_SECS
-            if not sync_successful and time_after_wait <= deadline:
-                time.sleep(self._SYNC_PERIOD_SECS)
-            else:
-                break
-        return sync_successful
+            if self.models_compatible(database_id, models):
+                return True
+            if time.monotonic() + delay > deadline:
+                return False
+            time.sleep(delay)
+            delay = min(delay * 1.5, self._SYNC_PERIOD_SECS)
 
     def models_compatible(self, database_id: str, models: Sequence) -> bool:
         """Checks if models compatible with the Metabase database schema.
@@ -137,30 +167,37 @@ class MetabaseClient:
             bool -- True if schema compatible with models, false otherwise.
         """
 
-        _, field_lookup = self.build_metadata_lookups(database_id)
+        lookups = self.build_metadata_lookups(database_id)
+        # Keep the latest metadata around for export_models to reuse
+        self._metadata_lookups[database_id] = lookups
+        _, field_lookup = lookups
 
-        are_models_compatible = True
-        for model in models:
+        wanted_lookups = {
+            f"{model.schema}.{model.name}": {column.name for column in model.columns}
+            for model in models
+        }
 
-            schema_name = model.schema.upper()
-            model_name = model.name.upper()
+        are_models_compatible = True
 
-            lookup_key = f"{schema_name}.{model_name}"
+        for lookup_key in sorted(wanted_lookups.keys() - field_lookup.keys()):
+            logging.warning(
+                "Model %s not found in %s schema",
+                lookup_key,
+                lookup_key.split(".", 1)[0],
+            )
+            are_models_compatible = False
 
-            if lookup_key not in field_lookup:
+        for lookup_key in wanted_lookups.keys() & field_lookup.keys():
+            missing_columns = (
+                wanted_lookups[lookup_key] - field_lookup[lookup_key].keys()
+            )
+            if missing_columns:
                 logging.warning(
-                    "Model %s not found in %s schema", lookup_key, schema_name
+                    "Columns %s not found in %s model",
+                    ", ".join(sorted(missing_columns)),
+                    lookup_key,
                 )
                 are_models_compatible = False
-            else:
-                table_lookup = field_lookup[lookup_key]
-                for column in model.columns:
-                    column_name = column.name.upper()
-                    if column_name not in table_lookup:
-                        logging.warning(
-                            "Column %s not found in %s model", column_name, lookup_key
-                        )
-                        are_models_compatible = False
 
         return are_models_compatible
 
@@ -183,10 +220,68 @@ class MetabaseClient:
             logging.critical("Cannot find database by name %s", database)
             return
 
-        table_lookup, field_lookup = self.build_metadata_lookups(database_id)
+        # Reuse metadata fetched while waiting for sync, if any
+        lookups = self._metadata_lookups.pop(database_id, None)
+        if lookups is None:
+            lookups = self.build_metadata_lookups(database_id)
+        table_lookup, field_lookup = lookups
+
+        # Each model only updates its own table and fields, so export them concurrently over the pooled session.
+        # Foreign key targets belong to other models, they are set to PK afterwards so that every field has a single writer.
+        with ThreadPoolExecutor(max_workers=self._EXPORT_MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(
+                    self.export_model, model, table_lookup, field_lookup, aliases
+                )
+                for model in models
+            ]
+        fk_target_field_ids: Set = set()
+        for future in futures:
+            # Re-raise any exception encountered during export
+            fk_target_field_ids.update(future.result())
+
+        self.export_primary_keys(fk_target_field_ids, field_lookup)
+
+    def export_primary_keys(self, field_ids: Iterable, field_lookup: dict):
+        """Sets foreign key target fields to PK in order to facilitate FK refs.
+
+        Arguments:
+            field_ids {Iterable} -- Metabase IDs of the foreign key target fields.
+            field_lookup {dict} -- Dictionary of Metabase fields indexed by name, indexed by table name.
+        """
+
+        fields_by_id = {
+            field["id"]: field
+            for table_fields in field_lookup.values()
+            for field in table_fields.values()
+        }
+
+        # Many foreign keys often share a target, each one is only updated once per export
+        for field_id in sorted(field_ids):
+            api_field = fields_by_id[field_id]
+            if "special_type" not in api_field and "semantic_type" not in api_field:
+                api_field = self.api("get", f"/api/field/{field_id}", critical=False)
+                if not api_field:
+                    continue
+
+            if "special_type" in api_field:
+                semantic_type = "special_type"
+            else:
+                semantic_type = "semantic_type"
 
-        for model in models:
-            self.export_model(model, table_lookup, field_lookup, aliases)
+            # Column updates from this export have been merged in, so a target they reset is set to PK again
+            if api_field.get(semantic_type) == "type/PK":
+                logging.info("Target field %s is already PK, skipping", field_id)
+                continue
+
+            logging.info(
+                "Setting target field %s to PK in order to facilitate FK ref",
+                field_id,
+            )
+            body = {semantic_type: "type/PK"}
+            if self.api("put", f"/api/field/{field_id}", critical=False, json=body):
+                self._merge_field(fields_by_id[field_id], body)
+                logging.info("Updated target field %s successfully", field_id)
 
     def export_model(
         self,
@@ -194,7 +289,7 @@ class MetabaseClient:
         table_lookup: dict,
         field_lookup: dict,
         aliases: dict,
-    ):
+    ) -> Set:
         """Exports one dbt model to Metabase database schema.
 
         Arguments:
@@ -202,17 +297,20 @@ class MetabaseClient:
             table_lookup {dict} -- Dictionary of Metabase tables indexed by name.
             field_lookup {dict} -- Dictionary of Metabase fields indexed by name, indexed by table name.
             aliases {dict} -- Provided by reader class. Shuttled down to column exports to resolve FK refs against relations to aliased source tables
+
+        Returns:
+            set -- Metabase IDs of the foreign key target fields, left for export_primary_keys.
         """
 
-        schema_name = model.schema.upper()
-        model_name = model.name.upper()
+        schema_name = model.schema
+        model_name = model.name
 
         lookup_key = f"{schema_name}.{aliases.get(model_name, model_name)}"
 
         api_table = table_lookup.get(lookup_key)
         if not api_table:
             logging.error("Table %s does not exist in Metabase", lookup_key)
-            return
+            return set()
 
         # Empty strings not accepted by Metabase
         if not model.description:
@@ -223,19 +321,27 @@ class MetabaseClient:
         table_id = api_table["id"]
         if api_table["description"] != model_description and model_description:
             # Update with new values
-            self.api(
+            # Failed updates are logged and skipped rather than aborting the export
+            if self.api(
                 "put",
                 f"/api/table/{table_id}",
+                critical=False,
                 json={"description": model_description},
-            )
-            logging.info("Updated table %s successfully", lookup_key)
+            ):
+                logging.info("Updated table %s successfully", lookup_key)
         elif not model_description:
             logging.info("No model description provided for table %s", lookup_key)
         else:
             logging.info("Table %s is up-to-date", lookup_key)
 
+        fk_target_field_ids = set()
         for column in model.columns:
-            self.export_column(schema_name, model_name, column, field_lookup, aliases)
+            fk_target_field_id = self.export_column(
+                schema_name, model_name, column, field_lookup, aliases
+            )
+            if fk_target_field_id:
+                fk_target_field_ids.add(fk_target_field_id)
+        return fk_target_field_ids
 
     def export_column(
         self,
@@ -244,7 +350,7 @@ class MetabaseClient:
         column: MetabaseColumn,
         field_lookup: dict,
         aliases: dict,
-    ):
+    ) -> Optional[int]:
         """Exports one dbt column to Metabase database schema.
 
         Arguments:
@@ -252,21 +358,40 @@ class MetabaseClient:
             column {dict} -- One dbt column read from project.
             field_lookup {dict} -- Dictionary of Metabase fields indexed by name, indexed by table name.
             aliases {dict} -- Provided by reader class. Used to resolve FK refs against relations to aliased source tables
+
+        Returns:
+            int -- Metabase ID of the foreign key target field, left for export_primary_keys.
         """
 
         table_lookup_key = f"{schema_name}.{model_name}"
-        column_name = column.name.upper()
+        column_name = column.name
 
         field = field_lookup.get(table_lookup_key, {}).get(column_name)
         if not field:
             logging.error(
                 "Field %s.%s does not exist in Metabase", table_lookup_key, column_name
             )
-            return
+            return None
 
         field_id = field["id"]
 
-        api_field = self.api("get", f"/api/field/{field_id}")
+        # Database metadata already includes the field attributes we compare against,
+        # only fetch the field individually if this Metabase version omits any of them
+        api_field = field
+        if (
+            "special_type" not in api_field and "semantic_type" not in api_field
+        ) or any(
+            key not in api_field
+            for key in ("description", "visibility_type", "fk_target_field_id")
+        ):
+            api_field = self.api("get", f"/api/field/{field_id}", critical=False)
+            if not api_field:
+                logging.error(
+                    "Skipping field %s.%s, unable to read it from Metabase",
+                    table_lookup_key,
+                    column_name,
+                )
+                return None
 
         if "special_type" in api_field:
             semantic_type = "special_type"
@@ -277,16 +402,8 @@ class MetabaseClient:
         if column.semantic_type == "type/FK":
             # Target table could be aliased if we parse_ref() on a source, so we caught aliases during model parsing
             # This way we can unpack any alias mapped to fk_target_table when using yml folder parser
-            target_table = (
-                column.fk_target_table.upper()
-                if column.fk_target_table is not None
-                else None
-            )
-            target_field = (
-                column.fk_target_field.upper()
-                if column.fk_target_field is not None
-                else None
-            )
+            target_table = column.fk_target_table
+            target_field = column.fk_target_field
 
             if not target_table or not target_field:
                 logging.info(
@@ -315,18 +432,7 @@ class MetabaseClient:
                     field_lookup.get(target_table, {}).get(target_field, {}).get("id")
                 )
 
-                if fk_target_field_id:
-                    logging.info(
-                        "Setting target field %s to PK in order to facilitate FK ref for %s column",
-                        fk_target_field_id,
-                        column_name,
-                    )
-                    self.api(
-                        "put",
-                        f"/api/field/{fk_target_field_id}",
-                        json={semantic_type: "type/PK"},
-                    )
-                else:
+                if not fk_target_field_id:
                     logging.error(
                         "Unable to find foreign key target %s.%s",
                         target_table,
@@ -350,20 +456,34 @@ class MetabaseClient:
             or api_field["fk_target_field_id"] != fk_target_field_id
         ):
             # Update with new values
-            self.api(
-                "put",
-                f"/api/field/{field_id}",
-                json={
-                    "description": column_description,
-                    semantic_type: column.semantic_type,
-                    "visibility_type": column.visibility_type,
-                    "fk_target_field_id": fk_target_field_id,
-                },
-            )
-            logging.info("Updated field %s.%s successfully", model_name, column_name)
+            body = {
+                "description": column_description,
+                semantic_type: column.semantic_type,
+                "visibility_type": column.visibility_type,
+                "fk_target_field_id": fk_target_field_id,
+            }
+            if self.api("put", f"/api/field/{field_id}", critical=False, json=body):
+                self._merge_field(field, body)
+                logging.info(
+                    "Updated field %s.%s successfully", model_name, column_name
+                )
         else:
             logging.info("Field %s.%s is up-to-date", model_name, column_name)
 
+        return fk_target_field_id
+
+    def _merge_field(self, field: MutableMapping, body: Mapping):
+        """Merges a successful field update into the metadata fetched before the export.
+
+        Arguments:
+            field {MutableMapping} -- Metabase field from the metadata lookups.
+            body {Mapping} -- Attributes the field was updated with.
+        """
+
+        # Later comparisons in the same export must see what was written, not the stale metadata
+        with self._fields_lock:
+            field.update(body)
+
     def find_database_id(self, name: str) -> Optional[str]:
         """Finds Metabase database ID by name.
 
@@ -374,26 +494,35 @@ class MetabaseClient:
             str -- Metabase database ID.
         """
 
-        for database in self.api("get", "/api/database"):
-            if database["name"].upper() == name.upper():
-                return database["id"]
-        return None
+        database_name = name.upper()
+
+        # Databases rarely change during a run, only list them again on a miss
+        if database_name not in self._database_ids:
+            self._database_ids = {
+                database["name"].upper(): database["id"]
+                for database in self.api("get", "/api/database")
+            }
+
+        return self._database_ids.get(database_name)
 
     def build_metadata_lookups(
-        self, database_id: str, schemas_to_exclude: Iterable = None
+        self, database_id: str, schemas_to_exclude: Optional[FrozenSet[str]] = None
     ) -> Tuple[dict, dict]:
         """Builds table and field lookups.
 
         Arguments:
             database_id {str} -- Metabase database ID.
 
+        Keyword Arguments:
+            schemas_to_exclude {frozenset} -- Schema names to ignore, must already be uppercase. (default: {None})
+
         Returns:
             dict -- Dictionary of tables indexed by name.
             dict -- Dictionary of fields indexed by name, indexed by table name.
         """
 
         if schemas_to_exclude is None:
-            schemas_to_exclude = []
+            schemas_to_exclude = frozenset()
 
         table_lookup = {}
         field_lookup = {}
@@ -408,19 +537,14 @@ class MetabaseClient:
             table_schema = table_schema.upper() if table_schema else "PUBLIC"
             table_name = table["name"].upper()
 
-            if schemas_to_exclude:
-                schemas_to_exclude = {
-                    exclusion.upper() for exclusion in schemas_to_exclude
-                }
-
-                if table_schema in schemas_to_exclude:
-                    logging.debug(
-                        "Ignoring Metabase table %s in schema %s. It belongs to excluded schemas %s",
-                        table_name,
-                        table_schema,
-                        schemas_to_exclude,
-                    )
-                    continue
+            if table_schema in schemas_to_exclude:
+                logging.debug(
+                    "Ignoring Metabase table %s in schema %s. It belongs to excluded schemas %s",
+                    table_name,
+                    table_schema,
+                    schemas_to_exclude,
+                )
+                continue
 
             lookup_key = f"{table_schema}.{table_name}"
             table_lookup[lookup_key] = table
@@ -768,42 +892,71 @@ class MetabaseClient:
 
         Keyword Arguments:
             authenticated {bool} -- Includes session ID when true. (default: {True})
-            critical {bool} -- Raise on any HTTP errors. (default: {True})
+            critical {bool} -- Raise on any HTTP errors or invalid JSON, otherwise log them and return empty payload. (default: {True})
 
         Returns:
             Any -- JSON payload of the endpoint.
         """
 
-        headers: MutableMapping = {}
-        if "headers" not in kwargs:
-            kwargs["headers"] = headers
-        else:
-            headers = kwargs["headers"].copy()
-
-        if authenticated:
-            headers["X-Metabase-Session"] = self.session_id
-
-        response = requests.request(
-            method, f"{self.protocol}://{self.host}{path}", verify=self.verify, **kwargs
-        )
+        headers: MutableMapping = dict(kwargs.get("headers") or {})
+        if not authenticated:
+            # Headers set to None are dropped from the HTTP session defaults
+            headers["X-Metabase-Session"] = None
+        kwargs["headers"] = headers
+
+        # Serialize JSON payloads ourselves, using orjson when installed
+        payload = kwargs.pop("json", None)
+        if payload is not None:
+            headers["Content-Type"] = "application/json"
+            kwargs["data"] = dump_json(payload)
+
+        try:
+            response = self._session.request(
+                method,
+                f"{self.protocol}://{self.host}{path}",
+                verify=self.verify,
+                **kwargs,
+            )
+        except requests.exceptions.RequestException as error:
+            if critical:
+                raise
+            logging.error("HTTP request %s %s failed: %s", method, path, error)
+            return {}
 
         if critical:
             try:
                 response.raise_for_status()
             except requests.exceptions.HTTPError:
-                if "password" in kwargs["json"]:
+                if payload and "password" in payload:
                     logging.error("HTTP request failed. Response: %s", response.text)
                 else:
                     logging.error(
                         "HTTP request failed. Payload: %s. Response: %s",
-                        kwargs["json"],
+                        payload,
                         response.text,
                     )
                 raise
         elif not response.ok:
+            logging.error(
+                "HTTP request %s %s failed with status %s. Response: %s",
+                method,
+                path,
+                response.status_code,
+                response.text,
+            )
             return {}
 
-        response_json = json.loads(response.text)
+        # Parse raw bytes directly, skipping the text decoding step
+        try:
+            response_json = load_json(response.content)
+        except ValueError as error:
+            # Proxies may answer with an HTML page rather than the API response
+            if critical:
+                raise
+            logging.error(
+                "HTTP request %s %s returned invalid JSON: %s", method, path, error
+            )
+            return {}
 
         # Since X.40.0 responses are encapsulated in "data" with pagination parameters
         if "data" in response_json:
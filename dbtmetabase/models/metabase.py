@@ -19,6 +19,12 @@ class MetabaseColumn:
     fk_target_table: Optional[str] = None
     fk_target_field: Optional[str] = None
 
+    def __setattr__(self, name, value):
+        # Identifiers are matched against Metabase in uppercase, normalize them whenever they are set
+        if name in ("name", "fk_target_table", "fk_target_field") and value:
+            value = value.upper()
+        super().__setattr__(name, value)
+
 
 @dataclass
 class MetabaseModel:
@@ -29,3 +35,9 @@ class MetabaseModel:
     ref: Optional[str] = None
 
     columns: Sequence[MetabaseColumn] = field(default_factory=list)
+
+    def __setattr__(self, name, value):
+        # Uppercased for the same reason as MetabaseColumn identifiers
+        if name in ("name", "schema") and value:
+            value = value.upper()
+        super().__setattr__(name, value)
@@ -1,17 +1,23 @@
-import json
 import os
+from collections import defaultdict
 from typing import List, Iterable, Mapping, Optional, MutableMapping, Literal
 import logging
 
 from ..models.metabase import METABASE_META_FIELDS
+from ..utils import load_json
 from ..models.metabase import MetabaseModel, MetabaseColumn
 
+# Parsed manifests and their relationship tests indexed by path, reused while the file is unchanged
+_MANIFEST_CACHE: MutableMapping = {}
+
 
 class DbtManifestReader:
     """
     Reader for dbt manifest artifact.
     """
 
+    _MANIFEST_SECTIONS = ("nodes", "sources")
+
     def __init__(self, project_path: str):
         """Constructor.
 
@@ -21,6 +27,7 @@ class DbtManifestReader:
 
         self.manifest_path = os.path.expanduser(project_path)
         self.manifest: Mapping = {}
+        self.relationship_tests: Mapping = {}
         self.catch_aliases: MutableMapping = {}
 
     def read_models(
@@ -41,13 +48,45 @@ class DbtManifestReader:
         if excludes is None:
             excludes = []
 
+        # Normalize filters once rather than per node
+        database = database.upper()
+        target_schema = schema.upper() if schema else None
+        schema_excludes = frozenset(_schema.upper() for _schema in schema_excludes)
+        includes = frozenset(include.upper() for include in includes)
+        excludes = frozenset(exclude.upper() for exclude in excludes)
+
         path = self.manifest_path
         mb_models: List[MetabaseModel] = []
 
-        with open(path, "r") as manifest_file:
-            self.manifest = json.load(manifest_file)
+        stat = os.stat(path)
+        cache_key = os.path.realpath(path)
+        cache_stamp = (stat.st_mtime_ns, stat.st_size)
+
+        cached = _MANIFEST_CACHE.get(cache_key)
+        if cached and cached[0] == cache_stamp:
+            logging.debug("Reusing manifest %s parsed earlier", path)
+            _, self.manifest, self.relationship_tests = cached
+        else:
+            with open(path, "rb") as manifest_file:
+                manifest = load_json(manifest_file.read())
+            # Only retain the sections we read, macros and docs alone can dwarf the rest
+            self.manifest = {
+                key: manifest.get(key, {}) for key in self._MANIFEST_SECTIONS
+            }
+            del manifest
+            self.relationship_tests = self._read_relationship_tests()
+            _MANIFEST_CACHE[cache_key] = (
+                cache_stamp,
+                self.manifest,
+                self.relationship_tests,
+            )
 
         for _, node in self.manifest["nodes"].items():
+            if node["resource_type"] != "model":
+                # Target only model nodes
+                logging.debug("Skipping %s not of resource type model", node["name"])
+                continue
+
             model_name = node["name"].upper()
 
             if node["config"]["materialized"] == "ephemeral":
@@ -56,29 +95,26 @@ class DbtManifestReader:
                 )
                 continue
 
-            if node["database"].upper() != database.upper():
+            if node["database"].upper() != database:
                 # Skip model not associated with target database
                 logging.debug(
                     "Skipping %s not in target database %s", model_name, database
                 )
                 continue
 
-            if node["resource_type"] != "model":
-                # Target only model nodes
-                logging.debug("Skipping %s not of resource type model", model_name)
-                continue
+            node_schema = node["schema"].upper()
 
-            if schema and node["schema"].upper() != schema.upper():
+            if target_schema and node_schema != target_schema:
                 # Skip any models not in target schema
                 logging.debug(
                     "Skipping %s in schema %s not in target schema %s",
                     model_name,
                     node["schema"],
-                    schema,
+                    target_schema,
                 )
                 continue
 
-            if schema_excludes and node["schema"].upper() in schema_excludes:
+            if node_schema in schema_excludes:
                 # Skip any model in a schema marked for exclusion
                 logging.debug(
                     "Skipping %s in schema %s marked for exclusion",
@@ -100,31 +136,36 @@ class DbtManifestReader:
             )
 
         for _, node in self.manifest["sources"].items():
+            if node["resource_type"] != "source":
+                # Target only source nodes
+                logging.debug(
+                    "Skipping %s not of resource type source",
+                    node.get("identifier", node.get("name")),
+                )
+                continue
+
             model_name = node.get("identifier", node.get("name")).upper()
 
-            if node["database"].upper() != database.upper():
+            if node["database"].upper() != database:
                 # Skip model not associated with target database
                 logging.debug(
                     "Skipping %s not in target database %s", model_name, database
                 )
                 continue
 
-            if node["resource_type"] != "source":
-                # Target only source nodes
-                logging.debug("Skipping %s not of resource type source", model_name)
-                continue
+            node_schema = node["schema"].upper()
 
-            if schema and node["schema"].upper() != schema.upper():
+            if target_schema and node_schema != target_schema:
                 # Skip any models not in target schema
                 logging.debug(
                     "Skipping %s in schema %s not in target schema %s",
                     model_name,
                     node["schema"],
-                    schema,
+                    target_schema,
                 )
                 continue
 
-            if schema_excludes and node["schema"].upper() in schema_excludes:
+            if node_schema in schema_excludes:
                 # Skip any model in a schema marked for exclusion
                 logging.debug(
                     "Skipping %s in schema %s marked for exclusion",
@@ -172,37 +213,9 @@ class DbtManifestReader:
 
         mb_columns: List[MetabaseColumn] = []
 
-        children = self.manifest["child_map"][model["unique_id"]]
-        relationship_tests = {}
-
-        for child_id in children:
-            child = {}
-            if self.manifest[model_key]:
-                child = self.manifest[model_key].get(child_id, {})
-            if (
-                child.get("resource_type") == "test"
-                and child.get("test_metadata", {}).get("name") == "relationships"
-            ):
-                # Only proceed if we are seeing an explicitly declared relationship test
-
-                # To get the name of the foreign table, we could use child['test_metadata']['kwargs']['to'], which
-                # would return the ref() written in the test, but if the model as an alias, that's not enough.
-                # It is better to use child['depends_on']['nodes'] and exclude the current model
-
-                depends_on_id = list(
-                    set(child["depends_on"][model_key]) - {model["unique_id"]}
-                )[0]
-
-                fk_target_table_alias = self.manifest[model_key][depends_on_id]["alias"]
-                fk_target_schema = self.manifest[model_key][depends_on_id].get(
-                    "schema", "public"
-                )
-                fk_target_field = child["test_metadata"]["kwargs"]["field"].strip('"')
-
-                relationship_tests[child["column_name"]] = {
-                    "fk_target_table": f"{fk_target_schema}.{fk_target_table_alias}",
-                    "fk_target_field": fk_target_field,
-                }
+        relationship_tests: Mapping = {}
+        if model_key == "nodes":
+            relationship_tests = self.relationship_tests.get(model["unique_id"], {})
 
         for _, column in model.get("columns", {}).items():
             mb_columns.append(
@@ -241,6 +254,55 @@ class DbtManifestReader:
             ref=ref,
         )
 
+    def _read_relationship_tests(self) -> Mapping:
+        """Indexes dbt relationship tests by the models they depend on.
+
+        Returns:
+            dict -- Foreign key targets indexed by column name, indexed by model unique ID.
+        """
+
+        relationship_tests: MutableMapping = defaultdict(dict)
+
+        for _, node in self.manifest["nodes"].items():
+            if (
+                node.get("resource_type") != "test"
+                or node.get("test_metadata", {}).get("name") != "relationships"
+            ):
+                # Only proceed if we are seeing an explicitly declared relationship test
+                continue
+
+            # To get the name of the foreign table, we could use node['test_metadata']['kwargs']['to'], which
+            # would return the ref() written in the test, but if the model as an alias, that's not enough.
+            # It is better to use node['depends_on']['nodes'] and exclude the model being indexed
+            depends_on = node["depends_on"]["nodes"]
+            fk_target_field = node["test_metadata"]["kwargs"]["field"].strip('"')
+
+            for model_id in depends_on:
+                # Self-referencing relationships only depend on the model itself
+                depends_on_id = next(
+                    (node_id for node_id in depends_on if node_id != model_id),
+                    model_id,
+                )
+
+                fk_target = self.manifest["nodes"].get(depends_on_id)
+                if not fk_target:
+                    logging.debug(
+                        "Skipping relationship test %s, target %s is not a model",
+                        node["unique_id"],
+                        depends_on_id,
+                    )
+                    continue
+
+                fk_target_table_alias = fk_target["alias"]
+                fk_target_schema = fk_target.get("schema", "public")
+
+                relationship_tests[model_id][node["column_name"]] = {
+                    "fk_target_table": f"{fk_target_schema}.{fk_target_table_alias}",
+                    "fk_target_field": fk_target_field,
+                }
+
+        return relationship_tests
+
     def _read_column(
         self, column: Mapping, relationship: Optional[Mapping]
     ) -> MetabaseColumn:
@@ -265,7 +327,7 @@ class DbtManifestReader:
             mb_column.fk_target_field = relationship["fk_target_field"].upper()
             logging.debug(
                 "Relation from %s to %s.%s",
-                column.get("name", "").upper().strip('"'),
+                mb_column.name,
                 mb_column.fk_target_table,
                 mb_column.fk_target_field,
             )
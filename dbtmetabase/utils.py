@@ -1,5 +1,8 @@
+import json
 import logging
 import importlib.metadata
+from functools import lru_cache
+from typing import Any, Union
 
 
 def get_version() -> str:
@@ -22,3 +25,55 @@ def get_version() -> str:
         logging.warning("No version found in metadata")
 
     return "0.0.0-UNKONWN"
+
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """Imports orjson on first use, so that loading the CLI does not pay for the extension.
+
+    Returns:
+        module -- orjson module, or None if not installed.
+    """
+
+    try:
+        import orjson
+
+        return orjson
+    except ModuleNotFoundError:
+        return None
+
+
+def load_json(data: Union[str, bytes]) -> Any:
+    """Parses JSON document, using orjson if installed and the standard library otherwise.
+
+    Arguments:
+        data {Union[str, bytes]} -- JSON document to parse.
+
+    Returns:
+        Any -- Parsed JSON object.
+    """
+
+    orjson = _orjson()
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Standard library accepts NaN and Infinity, which orjson rejects
+            logging.debug("Falling back to json module to parse document")
+    return json.loads(data)
+
+
+def dump_json(obj: Any) -> bytes:
+    """Serializes object to JSON document, using orjson if installed and the standard library otherwise.
+
+    Arguments:
+        obj {Any} -- Object to serialize.
+
+    Returns:
+        bytes -- UTF-8 encoded JSON document.
+    """
+
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
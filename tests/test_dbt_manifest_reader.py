@@ -5,7 +5,10 @@ from dbtmetabase.parsers.dbt_manifest import (
     MetabaseModel,
     MetabaseColumn,
 )
+import json
 import logging
+import os
+import tempfile
 
 
 class MockDbtManifestReader(DbtManifestReader):
@@ -263,3 +266,40 @@ class TestDbtManifestReader(unittest.TestCase):
         ]
         self.assertEqual(models, expectation)
         logging.info("Done")
+
+    def test_read_models_filters(self):
+        models = self.reader.read_models(
+            database="test",
+            schema="public",
+            includes=["orders", "customers"],
+            excludes=["customers"],
+        )
+        self.assertEqual(["ORDERS"], [model.name for model in models])
+
+    def test_read_models_cached(self):
+        self.reader.read_models(database="test", schema="public")
+        reader = DbtManifestReader(
+            project_path="tests/fixtures/sample_project/target/manifest.json"
+        )
+        models = reader.read_models(database="test", schema="public")
+        # Unchanged manifest is parsed only once per process
+        self.assertIs(self.reader.manifest, reader.manifest)
+        self.assertEqual(
+            self.reader.read_models(database="test", schema="public"), models
+        )
+
+    def test_read_models_nan(self):
+        with open(self.reader.manifest_path) as f:
+            manifest = json.load(f)
+        # json.dump writes NaN by default, which orjson alone refuses to parse
+        manifest["metadata"]["nan"] = float("nan")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "manifest.json")
+            with open(path, "w") as f:
+                json.dump(manifest, f)
+            models = DbtManifestReader(project_path=path).read_models(
+                database="test", schema="public"
+            )
+        self.assertEqual(
+            self.reader.read_models(database="test", schema="public"), models
+        )
@@ -1,4 +1,7 @@
 import unittest
+from unittest import mock
+
+import requests
 
 from dbtmetabase.metabase import MetabaseClient
 from dbtmetabase.models.metabase import (
@@ -6,12 +9,12 @@ from dbtmetabase.models.metabase import (
     MetabaseColumn,
 )
 
+import copy
 import logging
 import json
 import yaml
 import os
 
-
 MODELS = [
     MetabaseModel(
         name="ORDERS",
@@ -251,17 +254,48 @@ MODELS = [
 
 
 class MockMetabaseClient(MetabaseClient):
+    def __init__(self, *args, **kwargs):
+        self.api_calls: list = []
+        super().__init__(*args, **kwargs)
+
     def get_session_id(self, user: str, password: str) -> str:
         return "dummy"
 
     def api(self, method: str, path: str, **kwargs):
         BASE_PATH = "tests/fixtures/mock_api/"
+        self.api_calls.append((method, path, kwargs.get("json")))
         if method == "get":
             if os.path.exists(f"{BASE_PATH}/{path.lstrip('/')}.json"):
                 with open(f"{BASE_PATH}/{path.lstrip('/')}.json") as f:
                     return json.load(f)
             else:
                 return {}
+        # Metabase responds to updates with the updated object
+        return kwargs.get("json")
+
+
+class StatefulMetabaseClient(MockMetabaseClient):
+    """Mock client whose field updates are reflected in later metadata reads."""
+
+    def __init__(self, *args, **kwargs):
+        with open("tests/fixtures/mock_api/api/database/2/metadata.json") as f:
+            self.metadata = json.load(f)
+        super().__init__(*args, **kwargs)
+
+    def fields(self) -> dict:
+        return {
+            field["id"]: field
+            for table in self.metadata["tables"]
+            for field in table["fields"]
+        }
+
+    def api(self, method: str, path: str, **kwargs):
+        response = super().api(method, path, **kwargs)
+        if method == "get" and path == "/api/database/2/metadata":
+            return copy.deepcopy(self.metadata)
+        if method == "put" and path.startswith("/api/field/"):
+            self.fields()[int(path.rsplit("/", 1)[-1])].update(kwargs["json"])
+        return response
 
 
 class TestMetabaseClient(unittest.TestCase):
@@ -346,3 +380,311 @@ class TestMetabaseClient(unittest.TestCase):
         )
         self.assertEqual(baseline_table_lookups, table_lookups)
         self.assertEqual(baseline_field_lookups, field_lookups)
+
+        table_lookups, field_lookups = mbc.build_metadata_lookups(
+            database_id=2, schemas_to_exclude=frozenset({"PUBLIC"})
+        )
+        self.assertEqual({}, table_lookups)
+        self.assertEqual({}, field_lookups)
+
+    def test_export_models(self):
+        mbc = self.client
+        mbc.export_models(
+            database="unit_testing",
+            models=copy.deepcopy(MODELS),
+            aliases={},
+        )
+        self.assertIn(
+            (
+                "put",
+                "/api/table/6",
+                {
+                    "description": "This table has basic information about orders, as well as some derived facts based on payments"
+                },
+            ),
+            mbc.api_calls,
+        )
+        self.assertIn(
+            (
+                "put",
+                "/api/field/51",
+                {
+                    "description": "Foreign key to the customers table",
+                    "semantic_type": "type/FK",
+                    "visibility_type": "normal",
+                    "fk_target_field_id": 38,
+                },
+            ),
+            mbc.api_calls,
+        )
+        # Field attributes are read from the database metadata, not fetched one by one
+        self.assertFalse(
+            [
+                path
+                for method, path, _ in mbc.api_calls
+                if method == "get" and path.startswith("/api/field/")
+            ]
+        )
+
+    def test_export_models_converges(self):
+        mbc = StatefulMetabaseClient(
+            host="localhost:3000",
+            user="dummy",
+            password="dummy",
+            use_http=True,
+        )
+        states = []
+        for _ in range(3):
+            mbc.export_models(
+                database="unit_testing", models=copy.deepcopy(MODELS), aliases={}
+            )
+            states.append(copy.deepcopy(mbc.fields()))
+        # Every export leaves Metabase in the same state
+        self.assertEqual(states[0], states[1])
+        self.assertEqual(states[1], states[2])
+        self.assertEqual("type/PK", states[0][38]["semantic_type"])
+        self.assertEqual(51, states[0][38]["fk_target_field_id"])
+        self.assertEqual("type/PK", states[0][51]["semantic_type"])
+        self.assertEqual(38, states[0][51]["fk_target_field_id"])
+
+    def test_sync_and_wait(self):
+        mbc = self.client
+        models = copy.deepcopy(MODELS[:1])
+        self.assertTrue(mbc.sync_and_wait("unit_testing", models, timeout=5))
+        mbc.export_models(database="unit_testing", models=models, aliases={})
+        # Metadata fetched while waiting for sync is reused by the export
+        self.assertEqual(
+            1,
+            mbc.api_calls.count(("get", "/api/database/2/metadata", None)),
+        )
+        # Database ID is resolved once for both
+        self.assertEqual(1, mbc.api_calls.count(("get", "/api/database", None)))
+
+    def test_export_models_existing_pk(self):
+        mbc = self.client
+        lookups = mbc.build_metadata_lookups(database_id=2)
+        lookups[1]["PUBLIC.CUSTOMERS"]["CUSTOMER_ID"]["semantic_type"] = "type/PK"
+        mbc._metadata_lookups[2] = lookups
+        mbc.export_models(
+            database="unit_testing", models=copy.deepcopy(MODELS[:1]), aliases={}
+        )
+        # Target field is already a primary key, so it is not updated again
+        self.assertNotIn(
+            ("put", "/api/field/38", {"semantic_type": "type/PK"}), mbc.api_calls
+        )
+        self.assertIn("/api/field/51", [path for _, path, _ in mbc.api_calls])
+
+    def test_export_models_existing_pk_reset(self):
+        mbc = self.client
+        lookups = mbc.build_metadata_lookups(database_id=2)
+        lookups[1]["PUBLIC.CUSTOMERS"]["CUSTOMER_ID"]["semantic_type"] = "type/PK"
+        mbc._metadata_lookups[2] = lookups
+        mbc.export_models(
+            database="unit_testing", models=copy.deepcopy(MODELS), aliases={}
+        )
+        # Its own column update resets the target to FK, so it is set to PK again
+        self.assertEqual(
+            ("put", "/api/field/38", {"semantic_type": "type/PK"}),
+            [call for call in mbc.api_calls if call[1] == "/api/field/38"][-1],
+        )
+
+    def test_export_models_pk_after_columns(self):
+        mbc = self.client
+        mbc.export_models(
+            database="unit_testing", models=copy.deepcopy(MODELS), aliases={}
+        )
+        # CUSTOMERS.CUSTOMER_ID is both an exported column and a foreign key target,
+        # it is set to PK once its own column update has landed
+        field_updates = [
+            payload
+            for method, path, payload in mbc.api_calls
+            if path == "/api/field/38"
+        ]
+        self.assertEqual("type/FK", field_updates[0]["semantic_type"])
+        self.assertEqual([{"semantic_type": "type/PK"}], field_updates[1:])
+
+    def test_models_compatible(self):
+        mbc = self.client
+        self.assertTrue(mbc.models_compatible(database_id=2, models=MODELS[:1]))
+        # CUSTOMERS.TOTAL_ORDER_AMOUNT is missing from Metabase
+        self.assertFalse(mbc.models_compatible(database_id=2, models=MODELS))
+
+    def test_export_models_shared_pk(self):
+        mbc = self.client
+        models = copy.deepcopy(MODELS[:1])
+        models[0].columns[0].semantic_type = "type/FK"
+        models[0].columns[0].fk_target_table = "PUBLIC.CUSTOMERS"
+        models[0].columns[0].fk_target_field = "CUSTOMER_ID"
+        mbc.export_models(database="unit_testing", models=models, aliases={})
+        # Both foreign keys target CUSTOMERS.CUSTOMER_ID, which is updated only once
+        self.assertEqual(
+            1,
+            mbc.api_calls.count(("put", "/api/field/38", {"semantic_type": "type/PK"})),
+        )
+
+    def test_export_models_shared_pk_failed(self):
+        class FailingMetabaseClient(MockMetabaseClient):
+            def api(self, method: str, path: str, **kwargs):
+                response = super().api(method, path, **kwargs)
+                if method == "put" and path == "/api/field/38":
+                    return {}
+                return response
+
+        mbc = FailingMetabaseClient(
+            host="localhost:3000",
+            user="dummy",
+            password="dummy",
+            use_http=True,
+        )
+        models = copy.deepcopy(MODELS[:1])
+        models[0].columns[0].semantic_type = "type/FK"
+        models[0].columns[0].fk_target_table = "PUBLIC.CUSTOMERS"
+        models[0].columns[0].fk_target_field = "CUSTOMER_ID"
+        mbc.export_models(database="unit_testing", models=models, aliases={})
+        # Shared target is attempted once per export, even if its update failed
+        self.assertEqual(
+            1,
+            mbc.api_calls.count(("put", "/api/field/38", {"semantic_type": "type/PK"})),
+        )
+
+    def test_export_models_field_unreadable(self):
+        class FailingMetabaseClient(MockMetabaseClient):
+            def api(self, method: str, path: str, **kwargs):
+                response = super().api(method, path, **kwargs)
+                if method == "get" and path == "/api/field/51":
+                    return {}
+                return response
+
+        mbc = FailingMetabaseClient(
+            host="localhost:3000",
+            user="dummy",
+            password="dummy",
+            use_http=True,
+        )
+        lookups = mbc.build_metadata_lookups(database_id=2)
+        # Older Metabase versions omit field attributes from the database metadata
+        del lookups[1]["PUBLIC.ORDERS"]["CUSTOMER_ID"]["description"]
+        mbc._metadata_lookups[2] = lookups
+        mbc.export_models(
+            database="unit_testing", models=copy.deepcopy(MODELS[:1]), aliases={}
+        )
+        # Unreadable field is skipped, the rest of the model is still exported
+        self.assertNotIn(
+            "/api/field/51", [path for m, path, _ in mbc.api_calls if m == "put"]
+        )
+        self.assertIn(("put", "/api/table/6"), [call[:2] for call in mbc.api_calls])
+        self.assertIn(("put", "/api/field/50"), [call[:2] for call in mbc.api_calls])
+
+    def test_export_models_lowercase_fk(self):
+        mbc = self.client
+        models = copy.deepcopy(MODELS[:1])
+        # Identifiers assigned after construction are normalized too
+        models[0].columns[1].fk_target_table = "public.customers"
+        models[0].columns[1].fk_target_field = "customer_id"
+        self.assertEqual("PUBLIC.CUSTOMERS", models[0].columns[1].fk_target_table)
+        mbc.export_models(database="unit_testing", models=models, aliases={})
+        self.assertIn(
+            ("put", "/api/field/38", {"semantic_type": "type/PK"}), mbc.api_calls
+        )
+
+    def test_export_models_shared_pk_outside_pool(self):
+        mbc = self.client
+        models = copy.deepcopy(MODELS[:1] + MODELS[2:4])
+        for model in models:
+            # ORDERS.ORDER_ID, STG_ORDERS.ORDER_ID and STG_PAYMENTS.PAYMENT_ID
+            model.columns[0].semantic_type = "type/FK"
+            model.columns[0].fk_target_table = "PUBLIC.CUSTOMERS"
+            model.columns[0].fk_target_field = "CUSTOMER_ID"
+        mbc.export_models(database="unit_testing", models=models, aliases={})
+        field_updates = [
+            payload
+            for method, path, payload in mbc.api_calls
+            if method == "put" and path.startswith("/api/field/")
+        ]
+        pk_update = {"semantic_type": "type/PK"}
+        # Foreign keys across models share one PK update, issued after every column update
+        self.assertEqual(1, field_updates.count(pk_update))
+        self.assertEqual(pk_update, field_updates[-1])
+
+
+class SessionMetabaseClient(MetabaseClient):
+    def get_session_id(self, user: str, password: str) -> str:
+        return "dummy"
+
+
+def mock_response(status_code: int = 200, content: bytes = b"{}"):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = content
+    return response
+
+
+class TestMetabaseClientApi(unittest.TestCase):
+    def setUp(self):
+        self.client = SessionMetabaseClient(
+            host="localhost:3000",
+            user="dummy",
+            password="dummy",
+            use_http=True,
+        )
+        self.request = mock.Mock(return_value=mock_response(content=b'{"id": 1}'))
+        self.client._session.request = self.request
+
+    def test_api_json_payload(self):
+        payload = {"description": "caf\u00e9", "fk_target_field_id": None}
+        self.assertEqual(
+            {"id": 1}, self.client.api("put", "/api/field/1", json=payload)
+        )
+        method, url = self.request.call_args.args
+        kwargs = self.request.call_args.kwargs
+        self.assertEqual(("put", "http://localhost:3000/api/field/1"), (method, url))
+        self.assertNotIn("json", kwargs)
+        self.assertIsInstance(kwargs["data"], bytes)
+        self.assertEqual(payload, json.loads(kwargs["data"]))
+        self.assertEqual("application/json", kwargs["headers"]["Content-Type"])
+
+    def test_api_authentication(self):
+        self.assertEqual("dummy", self.client._session.headers["X-Metabase-Session"])
+        self.client.api("get", "/api/database")
+        self.assertNotIn("X-Metabase-Session", self.request.call_args.kwargs["headers"])
+        self.client.api("post", "/api/session", authenticated=False, json={})
+        # None drops the session default header from the request
+        self.assertIsNone(
+            self.request.call_args.kwargs["headers"]["X-Metabase-Session"]
+        )
+
+    def test_api_data_envelope(self):
+        self.request.return_value = mock_response(content=b'{"data": [{"id": 2}]}')
+        self.assertEqual([{"id": 2}], self.client.api("get", "/api/database"))
+
+    def test_api_http_error(self):
+        self.request.return_value = mock_response(500, b'{"message": "error"}')
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(
+                {}, self.client.api("put", "/api/field/1", critical=False, json={})
+            )
+        with self.assertLogs(level="ERROR"):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                self.client.api("get", "/api/field/1")
+
+    def test_api_connection_error(self):
+        self.request.side_effect = requests.exceptions.ConnectionError("refused")
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual({}, self.client.api("get", "/api/field/1", critical=False))
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            self.client.api("get", "/api/field/1")
+
+    def test_api_invalid_json(self):
+        self.request.return_value = mock_response(content=b"<html>Bad gateway</html>")
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual({}, self.client.api("get", "/api/field/1", critical=False))
+        with self.assertRaises(ValueError):
+            self.client.api("get", "/api/field/1")
+
+    def test_api_retries(self):
+        for prefix in ("http://", "https://"):
+            retries = self.client._session.get_adapter(prefix).max_retries
+            self.assertEqual(5, retries.total)
+            self.assertEqual(0.25, retries.backoff_factor)
+            self.assertEqual([502, 503, 504], list(retries.status_forcelist))
+            self.assertFalse(retries.raise_on_status)